@@ -1,15 +1,118 @@
 from aiohttp import web
 from botbuilder.core import BotFrameworkAdapter, BotFrameworkAdapterSettings
-from botbuilder.schema import Activity
 from bot import MyAgentBot
+from logger import log, setup_logging
 from main import OpenAIAgent
+from models import (
+    InboundPayload,
+    JsonRpcEnvelope,
+    JsonRpcRequest,
+    JsonRpcResponse,
+    ResultMessage,
+    ResultTask,
+    RpcParams,
+    TaskStatus,
+    TextPart,
+)
+import logging
+import msgspec
+import orjson
 import os
-import traceback
-import uuid
+import time
+
+try:
+    from a2a.types import SendMessageSuccessResponse
+except ImportError:
+    SendMessageSuccessResponse = None
+
+# Pydantic validation of every A2A response is a debugging aid; keep it off the hot
+# path unless explicitly requested.
+_DEBUG_VALIDATE = os.getenv("A2A_VALIDATE", "0") == "1"
+
+def _uuid4_str() -> str:
+    """Random RFC 4122 version-4 UUID string without building a `uuid.UUID` object."""
+    b = bytearray(os.urandom(16))
+    b[6] = (b[6] & 0x0F) | 0x40
+    b[8] = (b[8] & 0x3F) | 0x80
+    h = b.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+def json_dumps(obj) -> str:
+    """Serialize ``obj`` with orjson for ``web.json_response``."""
+    return orjson.dumps(obj).decode()
+
+# Shared JSON encoder for msgspec-encoded responses.
+_ENCODER = msgspec.json.Encoder()
+
+def msgspec_response(obj, status: int = 200) -> web.Response:
+    """JSON response for msgspec Structs and plain JSON data, encoded straight to bytes."""
+    return web.Response(body=_ENCODER.encode(obj), status=status, content_type="application/json")
+
+class TaskStore:
+    """Bounded in-memory task store with two-generation eviction.
+
+    New tasks go into the current generation. Once it holds `maxsize // 2` tasks or
+    is `ttl / 2` seconds old, it becomes the previous generation and the old previous
+    one is dropped wholesale; the previous generation is also dropped as soon as its
+    start is `ttl` seconds old. Eviction is therefore amortized O(1) with no per-item
+    expiry scans.
+
+    A task is never returned more than `ttl` seconds after it was stored. Without size
+    pressure it stays retrievable for at least `ttl / 2` seconds; under size pressure
+    the most recent `maxsize // 2` tasks are always kept.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600.0, clock=time.monotonic):
+        self._generation_size = max(1, maxsize // 2)
+        self._ttl = ttl
+        self._clock = clock
+        self._current: dict[str, ResultTask] = {}
+        self._previous: dict[str, ResultTask] = {}
+        self._current_started = self._previous_started = clock()
+
+    def _maybe_rotate(self):
+        now = self._clock()
+        if not self._current:
+            # Nothing to age out; just restart the (empty) current generation's clock.
+            self._current_started = now
+        elif (
+            now - self._current_started >= self._ttl / 2
+            or len(self._current) >= self._generation_size
+        ):
+            self._previous, self._previous_started = self._current, self._current_started
+            self._current, self._current_started = {}, now
+        # Every task in the previous generation was stored at or after its start.
+        if self._previous and now - self._previous_started >= self._ttl:
+            self._previous = {}
+
+    def __setitem__(self, task_id: str, task: ResultTask):
+        self._maybe_rotate()
+        self._current[task_id] = task
+
+    def get(self, task_id: str, default=None):
+        self._maybe_rotate()
+        task = self._current.get(task_id)
+        if task is None:
+            task = self._previous.get(task_id, default)
+        return task
+
+    def __len__(self) -> int:
+        return len(self._current) + len(self._previous)
 
 # In-memory store for A2A tasks so orchestrators that poll `tasks/get` can retrieve
-# the final result.
-A2A_TASKS: dict[str, dict] = {}
+# the final result. Bounded so long-running servers don't grow without limit.
+A2A_TASKS = TaskStore(
+    maxsize=int(os.getenv("A2A_TASKS_MAX", "10000")),
+    ttl=float(os.getenv("A2A_TASKS_TTL_SECONDS", "3600")),
+)
+
+setup_logging()
+
+if _DEBUG_VALIDATE and SendMessageSuccessResponse is None:
+    log.warning(
+        "⚠️ A2A_VALIDATE=1 but a2a.types.SendMessageSuccessResponse could not be imported; "
+        "A2A response validation is disabled"
+    )
 
 # Bot Framework Adapter settings
 SETTINGS = BotFrameworkAdapterSettings(
@@ -28,8 +131,7 @@ BOT = MyAgentBot(openai_agent)
 
 # Error handler
 async def on_error(context, error):
-    print(f"❌ Error: {error}", flush=True)
-    print(traceback.format_exc())
+    log.error("❌ Error: %s", error, exc_info=error)
     try:
         await context.send_activity("Sorry, an error occurred.")
     except:
@@ -37,97 +139,149 @@ async def on_error(context, error):
 
 ADAPTER.on_turn_error = on_error
 
+# Body for 415 replies. aiohttp responses can't be shared across requests once
+# prepared, so only the encoded body is cached.
+_BAD_CONTENT_TYPE_BODY = b"Content-Type must be application/json"
+
+def _json_rpc_error(request_id, code: int, message: str, status: int = 400) -> web.Response:
+    return web.json_response(
+        {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}},
+        status=status,
+        dumps=json_dumps,
+    )
+
+def decode_inbound(raw: bytes) -> InboundPayload | JsonRpcRequest | web.Response:
+    """Decode a /api/messages body, or build the error response when it can't be.
+
+    The combined `InboundPayload` is tried first. If it doesn't fit and the body is a
+    JSON-RPC request, it is re-decoded without the Activity field constraints so A2A
+    clients get JSON-RPC error objects rather than a plain-text 400.
+    """
+    try:
+        return msgspec.json.decode(raw, type=InboundPayload)
+    except msgspec.ValidationError as e:
+        error = e
+    except msgspec.DecodeError as e:
+        log.warning("❌ Invalid request body: %s", e)
+        if b'"jsonrpc"' in raw:
+            return _json_rpc_error(None, -32700, f"Parse error: {e}")
+        return web.Response(status=400, text=f"Invalid request body: {e}")
+
+    try:
+        envelope = msgspec.json.decode(raw, type=JsonRpcEnvelope)
+    except msgspec.ValidationError:
+        envelope = JsonRpcEnvelope()
+    if envelope.jsonrpc is None:
+        log.warning("❌ Invalid request body: %s", error)
+        return web.Response(status=400, text=f"Invalid request body: {error}")
+
+    try:
+        request = msgspec.json.decode(raw, type=JsonRpcRequest)
+    except msgspec.ValidationError as e:
+        log.warning("❌ Invalid JSON-RPC params: %s", e)
+        return _json_rpc_error(envelope.id, -32602, f"Invalid params: {e}")
+    if not request.method:
+        log.warning("❌ Invalid JSON-RPC request: %s", error)
+        return _json_rpc_error(envelope.id, -32600, f"Invalid Request: {error}")
+    return request
+
 # Handle incoming messages
 async def messages(req: web.Request) -> web.Response:
     try:
-        print(f"\n📥 Incoming request from {req.remote}")
+        log.info("📥 Incoming request from %s", req.remote)
         
         # Check content type
-        if req.content_type != "application/json" and "application/json" not in req.content_type:
-            print(f"❌ Invalid content type: {req.content_type}")
-            return web.Response(status=415, text="Content-Type must be application/json")
+        content_type = req.content_type
+        if "json" not in content_type:
+            log.warning("❌ Invalid content type: %s", content_type)
+            return web.Response(status=415, body=_BAD_CONTENT_TYPE_BODY, content_type="text/plain")
+
+        # Decode the body once into a typed payload that covers both JSON-RPC (A2A)
+        # requests and Bot Framework Activities, then dispatch on it.
+        payload = decode_inbound(await req.read())
+        if isinstance(payload, web.Response):
+            return payload
 
-        # Parse the JSON body
-        body = await req.json()
-        
         # Check if this is a JSON-RPC (A2A) message
-        if "jsonrpc" in body and body.get("method"):
-            method = body.get("method")
-            print(f"📨 Detected JSON-RPC (Agent-to-Agent) message: {method}")
+        if payload.jsonrpc is not None and payload.method:
+            method = payload.method
+            log.info("📨 Detected JSON-RPC (Agent-to-Agent) message: %s", method)
 
-            if method == "message/send":
-                return await handle_a2a_message(body)
-            if method == "tasks/get":
-                return await handle_a2a_tasks_get(body)
+            match method:
+                case "message/send":
+                    return await handle_a2a_message(payload)
+                case "tasks/get":
+                    return await handle_a2a_tasks_get(payload)
 
             # Unsupported A2A method
             return web.json_response(
                 {
                     "jsonrpc": "2.0",
-                    "id": body.get("id"),
+                    "id": payload.id,
                     "error": {
                         "code": -32601,
                         "message": f"Method not found: {method}",
                     },
                 },
                 status=400,
+                dumps=json_dumps,
             )
         
         # Otherwise, try to handle as Bot Framework Activity
-        print("📨 Detected Bot Framework Activity")
-        activity = Activity().deserialize(body)
+        log.info("📨 Detected Bot Framework Activity")
+        activity = payload.to_activity()
         
         if not activity.type:
-            print("❌ Missing activity type")
+            log.warning("❌ Missing activity type")
             return web.Response(status=400, text="Missing activity type")
         
-        print(f"   Activity type: {activity.type}")
+        log.debug("   Activity type: %s", activity.type)
         if activity.type == "message":
-            print(f"   Message text: {activity.text}")
+            log.debug("   Message text: %s", activity.text)
         
         auth_header = req.headers.get("Authorization", "")
         
-        print("   Processing activity...")
+        log.debug("   Processing activity...")
         response = await ADAPTER.process_activity(activity, auth_header, BOT.on_turn)
         
         if response:
-            print(f"✅ Response sent (status {response.status})")
-            return web.json_response(data=response.body, status=response.status)
+            log.info("✅ Response sent (status %s)", response.status)
+            return msgspec_response(response.body, status=response.status)
         
-        print("✅ Activity processed successfully")
+        log.info("✅ Activity processed successfully")
         return web.Response(status=201)
         
     except Exception as e:
-        print(f"❌ Error in messages endpoint: {str(e)}")
-        print(traceback.format_exc())
+        log.exception("❌ Error in messages endpoint: %s", e)
         return web.Response(status=500, text=f"Internal server error: {str(e)}")
 
+# Appended to every A2A reply so orchestrators pass the agent output through verbatim.
+_PASSTHROUGH_SUFFIX = (
+    "\n\n[This is the complete weather information from the Weather Information Agent. "
+    "Display this exact information to the user.]"
+)
+
 # Handle Agent-to-Agent (A2A) JSON-RPC messages
-# Handle Agent-to-Agent (A2A) JSON-RPC messages
-async def handle_a2a_message(body: dict) -> web.Response:
+async def handle_a2a_message(request: InboundPayload | JsonRpcRequest) -> web.Response:
     try:
-        params = body.get("params", {})
-        message = params.get("message", {})
-        parts = message.get("parts", [])
-        
-        user_text = ""
-        for part in parts:
-            if part.get("kind") == "text":
-                user_text = part.get("text", "")
-                break
+        message = (request.params or RpcParams()).message
+        user_text = next(
+            (part.get("text", "") for part in message.parts if part.get("kind") == "text"),
+            "",
+        )
         
         if not user_text:
-            print("❌ No text found in A2A message")
+            log.warning("❌ No text found in A2A message")
             return web.json_response({
                 "jsonrpc": "2.0",
-                "id": body.get("id"),
+                "id": request.id,
                 "error": {"code": -32600, "message": "No text found in message"}
-            }, status=400)
+            }, status=400, dumps=json_dumps)
         
-        print(f"   User message: {user_text}")
+        log.debug("   User message: %s", user_text)
         
         # Process with your OpenAI agent
-        print("🤔 Processing with OpenAI agent...")
+        log.debug("🤔 Processing with OpenAI agent...")
         response_text = await openai_agent.run_query(user_text)
         
         # Extract text from response
@@ -138,13 +292,12 @@ async def handle_a2a_message(body: dict) -> web.Response:
         else:
             response_text = str(response_text)
         
-        print(f"✅ Agent Response (first 200 chars): {response_text[:200]}...")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("✅ Agent Response (first 200 chars): %s...", response_text[:200])
         
         # Format response with explicit pass-through instruction
         # Use a format that discourages rewriting
-        final_response = f"""{response_text}
-
-[This is the complete weather information from the Weather Information Agent. Display this exact information to the user.]"""
+        final_response = "".join((response_text, _PASSTHROUGH_SUFFIX))
         
         # Create the JSON-RPC response.
         # IMPORTANT: For A2A `message/send`, the JSON-RPC success response `result`
@@ -154,111 +307,87 @@ async def handle_a2a_message(body: dict) -> web.Response:
         # Some orchestrators (including Copilot Studio integrations) expect a Task
         # result so they can track state/history. Return a completed Task with the
         # assistant message embedded in `status.message`.
-        context_id = message.get("contextId") or message.get("context_id")
-        task_id = str(uuid.uuid4())
+        context_id = message.contextId or message.context_id
+        task_id = _uuid4_str()
 
-        user_message_id = message.get("messageId") or message.get("message_id") or str(
-            uuid.uuid4()
-        )
+        user_message_id = message.messageId or message.message_id or _uuid4_str()
 
-        result_message = {
-            "contextId": context_id,
-            "kind": "message",
-            "messageId": str(uuid.uuid4()),
-            "taskId": task_id,
-            "parts": [
-                {
-                    "kind": "text",
-                    "text": final_response,
-                }
-            ],
-            "role": "agent",
-        }
+        result_message = ResultMessage(
+            contextId=context_id,
+            messageId=_uuid4_str(),
+            taskId=task_id,
+            parts=[TextPart(text=final_response)],
+            role="agent",
+        )
 
         # Reconstruct the user message for history (helps orchestrators that display
         # the full task transcript).
-        history_user_message = {
-            "contextId": context_id,
-            "kind": "message",
-            "messageId": user_message_id,
-            "taskId": task_id,
-            "parts": [
-                {
-                    "kind": "text",
-                    "text": user_text,
-                }
-            ],
-            "role": "user",
-        }
-
-        result_task = {
-            "kind": "task",
-            "id": task_id,
-            "contextId": context_id or str(uuid.uuid4()),
-            "history": [history_user_message, result_message],
-            "status": {
-                "state": "completed",
-                "message": result_message,
-            },
-        }
+        history_user_message = ResultMessage(
+            contextId=context_id,
+            messageId=user_message_id,
+            taskId=task_id,
+            parts=[TextPart(text=user_text)],
+            role="user",
+        )
+
+        result_task = ResultTask(
+            id=task_id,
+            contextId=context_id or _uuid4_str(),
+            history=[history_user_message, result_message],
+            status=TaskStatus(state="completed", message=result_message),
+        )
 
         # Persist so the orchestrator can call tasks/get.
         A2A_TASKS[task_id] = result_task
 
-        json_rpc_response = {
-            "jsonrpc": "2.0",
-            "id": body.get("id"),
-            "result": result_task,
-        }
-
-        # Best-effort schema validation for easier debugging in logs.
-        try:
-            from a2a.types import SendMessageSuccessResponse
+        json_rpc_response = JsonRpcResponse(id=request.id, result=result_task)
 
-            SendMessageSuccessResponse.model_validate(json_rpc_response)
-        except Exception as ve:
-            print(f"❌ A2A response validation failed: {ve}")
-            # Still return the response; the caller may provide additional diagnostics.
+        # Best-effort schema validation for easier debugging in logs (A2A_VALIDATE=1).
+        if _DEBUG_VALIDATE and SendMessageSuccessResponse is not None:
+            try:
+                SendMessageSuccessResponse.model_validate(msgspec.to_builtins(json_rpc_response))
+            except Exception as ve:
+                log.warning("❌ A2A response validation failed: %s", ve)
+                # Still return the response; the caller may provide additional diagnostics.
         
-        print(f"📤 Sending response ({len(final_response)} chars)")
+        log.info("📤 Sending response (%d chars)", len(final_response))
 
-        return web.json_response(json_rpc_response)
+        return msgspec_response(json_rpc_response)
         
     except Exception as e:
-        print(f"❌ Error handling A2A message: {str(e)}")
-        print(traceback.format_exc())
+        log.exception("❌ Error handling A2A message: %s", e)
         return web.json_response({
             "jsonrpc": "2.0",
-            "id": body.get("id"),
+            "id": request.id,
             "error": {"code": -32603, "message": f"Internal error: {str(e)}"}
-        }, status=500)
+        }, status=500, dumps=json_dumps)
 
 
-async def handle_a2a_tasks_get(body: dict) -> web.Response:
+async def handle_a2a_tasks_get(request: InboundPayload | JsonRpcRequest) -> web.Response:
     """Handle A2A `tasks/get` so orchestrators can poll for the result."""
     try:
-        params = body.get("params", {})
-        task_id = params.get("id")
-        if not task_id:
+        task_id = request.params.id if request.params else None
+        if task_id is None or task_id == "":
             return web.json_response(
                 {
                     "jsonrpc": "2.0",
-                    "id": body.get("id"),
+                    "id": request.id,
                     "error": {
                         "code": -32602,
                         "message": "Invalid parameters: missing params.id",
                     },
                 },
                 status=400,
+                dumps=json_dumps,
             )
 
-        task = A2A_TASKS.get(task_id)
-        if not task:
+        task = A2A_TASKS.get(str(task_id))
+        if task is None:
             # A2A TaskNotFoundError code
             return web.json_response(
                 {
                     "jsonrpc": "2.0",
-                    "id": body.get("id"),
+                    "id": request.id,
                     "error": {
                         "code": -32001,
                         "message": "Task not found",
@@ -266,46 +395,52 @@ async def handle_a2a_tasks_get(body: dict) -> web.Response:
                     },
                 },
                 status=404,
+                dumps=json_dumps,
             )
 
-        return web.json_response(
-            {
-                "jsonrpc": "2.0",
-                "id": body.get("id"),
-                "result": task,
-            }
-        )
+        return msgspec_response(JsonRpcResponse(id=request.id, result=task))
 
     except Exception as e:
-        print(f"❌ Error handling tasks/get: {str(e)}")
-        print(traceback.format_exc())
+        log.exception("❌ Error handling tasks/get: %s", e)
         return web.json_response(
             {
                 "jsonrpc": "2.0",
-                "id": body.get("id"),
+                "id": request.id,
                 "error": {"code": -32603, "message": f"Internal error: {str(e)}"},
             },
             status=500,
+            dumps=json_dumps,
         )
 
 # Health check endpoint
 async def health(req: web.Request) -> web.Response:
-    return web.json_response({"status": "healthy", "agent": openai_agent.agent_name})
+    return web.json_response({"status": "healthy", "agent": openai_agent.agent_name}, dumps=json_dumps)
+
+async def on_cleanup(app: web.Application):
+    await openai_agent.close()
 
 # Create web app
 app = web.Application()
 app.router.add_post("/api/messages", messages)
 app.router.add_get("/health", health)
+app.on_cleanup.append(on_cleanup)
 
 if __name__ == "__main__":
     try:
         port = int(os.getenv("PORT", "3978"))
-        print(f"🚀 Starting bot server on port {port}...")
-        print(f"📍 Endpoint: http://localhost:{port}/api/messages")
-        print(f"💚 Health check: http://localhost:{port}/health")
-        print(f"🔗 Supports: Bot Framework Activity & Agent-to-Agent (JSON-RPC)")
-        print("\n✅ Server ready!\n")
-        web.run_app(app, host="0.0.0.0", port=port)
+        try:
+            import uvloop
+            uvloop.install()
+            log.info("⚡ Using uvloop event loop")
+        except ImportError:
+            # uvloop isn't available on Windows; fall back to the default loop.
+            pass
+        log.info("🚀 Starting bot server on port %d...", port)
+        log.info("📍 Endpoint: http://localhost:%d/api/messages", port)
+        log.info("💚 Health check: http://localhost:%d/health", port)
+        log.info("🔗 Supports: Bot Framework Activity & Agent-to-Agent (JSON-RPC)")
+        log.info("✅ Server ready!")
+        web.run_app(app, host="0.0.0.0", port=port, access_log=None)
     except Exception as error:
-        print(f"❌ Failed to start server: {error}")
+        log.error("❌ Failed to start server: %s", error)
         raise error
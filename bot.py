@@ -1,15 +1,16 @@
 from botbuilder.core import ActivityHandler, TurnContext
 from botbuilder.schema import ChannelAccount
-import traceback
+from logger import log
+import logging
 
 class MyAgentBot(ActivityHandler):
     def __init__(self, openai_agent):
         self.agent = openai_agent
-        print("✅ Bot initialized with OpenAI agent")
+        log.info("✅ Bot initialized with OpenAI agent")
     
     async def on_message_activity(self, turn_context: TurnContext):
         try:
-            print(f"📨 Received message: {turn_context.activity.text}")
+            log.debug("📨 Received message: %s", turn_context.activity.text)
             
             # Get user message
             user_message = turn_context.activity.text
@@ -19,7 +20,7 @@ class MyAgentBot(ActivityHandler):
                 return
             
             # Process with your existing agent
-            print("🤔 Processing with OpenAI agent...")
+            log.debug("🤔 Processing with OpenAI agent...")
             response = await self.agent.run_query(user_message)
             
             # Extract text from AgentRunResponse
@@ -33,18 +34,19 @@ class MyAgentBot(ActivityHandler):
                 # Fallback
                 response_text = str(response)
             
-            print(f"✅ Sending response: {response_text[:100]}...")
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("✅ Sending response: %s...", response_text[:100])
             
             # Send response back
             await turn_context.send_activity(str(response_text))
             
         except Exception as e:
             error_msg = str(e)
-            print(f"❌ Error in on_message_activity: {error_msg}")
+            expected = "test.com" in error_msg
+            log.error("❌ Error in on_message_activity: %s", error_msg, exc_info=not expected)
             
             # Don't show serviceUrl errors to the user (they're expected in testing)
-            if "test.com" not in error_msg:
-                print(traceback.format_exc())
+            if not expected:
                 await turn_context.send_activity(f"Sorry, I encountered an error: {error_msg}")
     
     async def on_members_added_activity(
@@ -0,0 +1,33 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+# Shared application logger. Handlers only enqueue records; a background thread does
+# the actual stdout writes so request handlers never block on I/O.
+log = logging.getLogger("agent")
+
+_listener: logging.handlers.QueueListener | None = None
+
+def setup_logging() -> None:
+    """Attach the queue-backed stdout handler to the `agent` logger (idempotent).
+
+    The level defaults to INFO and can be overridden with the LOG_LEVEL env var.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    log.addHandler(logging.handlers.QueueHandler(log_queue))
+    log.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    log.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -1,19 +1,89 @@
+import aiohttp
 import asyncio
-import json
+import orjson
 import os
 import re
-import requests
+from collections import OrderedDict
 from typing import Annotated
 from pydantic import Field
 from dotenv import load_dotenv
 from agent_framework import ChatAgent, HostedMCPTool
 from agent_framework.openai import OpenAIChatClient
+from logger import log, setup_logging
 
 # Load environment variables
 load_dotenv()
 
+# Shared keep-alive HTTP session for OpenWeatherMap calls. Created lazily inside the
+# running event loop and closed via `OpenAIAgent.close()`.
+_HTTP: aiohttp.ClientSession | None = None
+
+def _http_session() -> aiohttp.ClientSession:
+    global _HTTP
+    if _HTTP is None or _HTTP.closed:
+        _HTTP = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=10),
+        )
+    return _HTTP
+
+async def _fetch_json(url: str, params: dict):
+    """GET `url` on the shared session and decode the JSON body with orjson."""
+    async with _http_session().get(url, params=params) as response:
+        if response.status >= 400:
+            # Try to surface OpenWeather's error message if present.
+            details = None
+            try:
+                payload = await response.json(loads=orjson.loads, content_type=None)
+                details = payload.get("message") if isinstance(payload, dict) else None
+            except Exception:
+                details = None
+            raise aiohttp.ClientResponseError(
+                response.request_info,
+                response.history,
+                status=response.status,
+                message=details or "",
+            )
+        return await response.json(loads=orjson.loads, content_type=None)
+
+# Geocoding results are effectively static, so cache them to keep only the weather
+# lookup on the hot path. Keyed on the normalized location string.
+_GEOCODE_CACHE: OrderedDict[str, tuple[float, float, dict]] = OrderedDict()
+_GEOCODE_CACHE_SIZE = 4096
+
+async def _geocode(location: str, api_key: str) -> tuple[float, float, dict] | None:
+    """Return `(lat, lon, geocoding_result)` for `location`, or None if not found."""
+    key = location.strip().lower()
+    cached = _GEOCODE_CACHE.get(key)
+    if cached is not None:
+        _GEOCODE_CACHE.move_to_end(key)
+        return cached
+
+    geocoding_url = "https://api.openweathermap.org/geo/1.0/direct"
+    geocoding_params = {
+        'q': location,
+        'limit': 1,
+        'appid': api_key
+    }
+
+    # Avoid printing secrets (API keys) in logs.
+    log.debug("Geocoding request: %s?q=%s&limit=1&appid=***", geocoding_url, location)
+    geo_data = await _fetch_json(geocoding_url, geocoding_params)
+    if not geo_data:
+        # Don't cache misses; the user may retry with a corrected name.
+        return None
+
+    result = (geo_data[0]['lat'], geo_data[0]['lon'], geo_data[0])
+    _GEOCODE_CACHE[key] = result
+    if len(_GEOCODE_CACHE) > _GEOCODE_CACHE_SIZE:
+        _GEOCODE_CACHE.popitem(last=False)
+    return result
+
+# Human-readable line appended after the raw payload in `get_weather`.
+_WEATHER_TMPL = "The weather in {loc} is {desc} with a temperature of {temp}°C and humidity of {hum}%."
+
 # Weather function using OpenWeatherMap API
-def get_weather(
+async def get_weather(
     location: Annotated[str, Field(description="The location to get the weather for (e.g., 'London', 'New York').")]
 ) -> str:
     """Get real weather data for a given location using OpenWeatherMap API."""
@@ -22,25 +92,13 @@ def get_weather(
         if not api_key:
             return "Weather API key not configured. Please set OPENWEATHER_API_KEY in .env file."
         
-        # First get coordinates for the location using Geocoding API
-        geocoding_url = "https://api.openweathermap.org/geo/1.0/direct"
-        geocoding_params = {
-            'q': location,
-            'limit': 1,
-            'appid': api_key
-        }
-
-        # Avoid printing secrets (API keys) in logs.
-        print(f"Geocoding request: {geocoding_url}?q={location}&limit=1&appid=***")
-        geo_response = requests.get(geocoding_url, params=geocoding_params, timeout=10)
-        geo_response.raise_for_status()
-        geo_data = geo_response.json()
+        # Coordinates come from the Geocoding API, memoized per location.
+        geocoded = await _geocode(location, api_key)
         
-        if not geo_data:
+        if geocoded is None:
             return f"Could not find coordinates for '{location}'. Please check the location name."
         
-        lat = geo_data[0]['lat']
-        lon = geo_data[0]['lon']
+        lat, lon, geo_result = geocoded
         
         # Get weather data using Current Weather Data API (more widely available than One Call 3.0)
         # Docs: https://openweathermap.org/current
@@ -52,61 +110,82 @@ def get_weather(
             'units': 'metric'  # Use Celsius
         }
 
-        # Construct full URL for debugging without leaking secrets
-        full_weather_url = f"{weather_url}?lat={lat}&lon={lon}&appid=***&units=metric"
-        print(f"Weather request: {full_weather_url}")
+        # Log the full URL for debugging without leaking secrets
+        log.debug("Weather request: %s?lat=%s&lon=%s&appid=***&units=metric", weather_url, lat, lon)
         
-        weather_response = requests.get(weather_url, params=weather_params, timeout=10)
-        weather_response.raise_for_status()
-        weather_data = weather_response.json()
+        weather_data = await _fetch_json(weather_url, weather_params)
 
         # Build a response that includes the *full* raw API payload plus a short summary.
         # Returning the raw JSON here ensures the agent can pass it through verbatim.
         raw_payload = {
-            "geocoding": geo_data[0],
+            "geocoding": geo_result,
             "weather": weather_data,
         }
         
         # Extract weather information
-        temp = weather_data['main']['temp']
-        humidity = weather_data['main']['humidity']
-        weather_desc = weather_data['weather'][0]['description'].title()
-
-        summary = (
-            f"The weather in {location.title()} is {weather_desc} with a temperature of {temp}°C "
-            f"and humidity of {humidity}%."
-        )
-
-        return (
-            "FULL_OPENWEATHERMAP_API_RESPONSE (JSON):\n"
-            f"```json\n{json.dumps(raw_payload, ensure_ascii=False, indent=2)}\n```\n\n"
-            "SUMMARY:\n"
-            f"{summary}"
-        )
+        summary = _WEATHER_TMPL.format_map({
+            "loc": location.title(),
+            "desc": weather_data['weather'][0]['description'].capitalize(),
+            "temp": weather_data['main']['temp'],
+            "hum": weather_data['main']['humidity'],
+        })
 
-    except requests.exceptions.HTTPError as e:
-        status = getattr(e.response, "status_code", None)
-        # Try to surface OpenWeather's error message if present.
-        details = None
-        try:
-            if e.response is not None:
-                payload = e.response.json()
-                details = payload.get("message") if isinstance(payload, dict) else None
-        except Exception:
-            details = None
+        # Assemble in bytes so the orjson output is used as-is (no intermediate str).
+        pretty = orjson.dumps(raw_payload, option=orjson.OPT_INDENT_2)
+        return b"".join((
+            b"FULL_OPENWEATHERMAP_API_RESPONSE (JSON):\n```json\n",
+            pretty,
+            b"\n```\n\nSUMMARY:\n",
+            summary.encode(),
+        )).decode()
 
-        msg = f"OpenWeatherMap API error{f' ({status})' if status else ''}."
-        if details:
-            msg += f" Details: {details}"
+    except aiohttp.ClientResponseError as e:
+        msg = f"OpenWeatherMap API error{f' ({e.status})' if e.status else ''}."
+        if e.message:
+            msg += f" Details: {e.message}"
         return msg
 
-    except requests.exceptions.RequestException as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         return f"Network/connection error fetching weather data: {str(e)}"
     except KeyError as e:
         return f"Error parsing weather data: Missing field {str(e)}. This might be due to API limitations."
     except Exception as e:
         return f"Unexpected error getting weather: {str(e)}"
 
+# Precompiled patterns for the weather bypass in `OpenAIAgent.run_query`.
+_WEATHER_RE = re.compile(r"\bweather\b", re.IGNORECASE)
+_LOC_RE = re.compile(r"\bweather\b.*?\b(?:in|for)\s+([^?\n\r]+)", re.IGNORECASE)
+_SPLIT_RE = re.compile(
+    r"\s*(?:,|;|\.|\(|\)|\bincluding\b|\bwith\b|\bshow\b|\bgive\b|\band\b)\s*",
+    re.IGNORECASE,
+)
+
+def _looks_like_weather_query(query: str) -> bool:
+    # Cheap substring check rules out most traffic; the regex only confirms word
+    # boundaries when "weather" is actually present.
+    q = query.lower()
+    return "weather" in q and _WEATHER_RE.search(q) is not None
+
+def _extract_location_from_weather_query(query: str) -> str:
+    """Best-effort location extractor.
+
+    The caller often sends queries like:
+    - "weather in Faisalabad"
+    - "weather in Faisalabad, including temperature, humidity, wind speed..."
+
+    We only want the actual place name for geocoding, not the rest of the request.
+    """
+
+    # Common patterns: "weather in Karachi", "weather for London".
+    m = _LOC_RE.search(query)
+    location = m.group(1).strip() if m else query.strip()
+
+    # Truncate on separators / common continuation phrases.
+    # e.g. "Faisalabad, including temperature..." -> "Faisalabad"
+    location = _SPLIT_RE.split(location, maxsplit=1)[0]
+
+    return location.strip().strip("?").strip()
+
 class OpenAIAgent:
     def __init__(self):
         """Initialize the OpenAI Agent with configuration from environment variables."""
@@ -116,6 +195,7 @@ class OpenAIAgent:
         self.agent_description = os.getenv("AGENT_DESCRIPTION", "An AI agent powered by OpenAI that can answer user queries and use various tools")
         self.mcp_server_url = os.getenv("MCP_SERVER_URL")
         self.mcp_server_timeout = int(os.getenv("MCP_SERVER_TIMEOUT", "30"))
+        self._inflight: dict[str, asyncio.Future] = {}
         
         # Initialize OpenAI client
         self.chat_client = OpenAIChatClient(
@@ -163,45 +243,41 @@ class OpenAIAgent:
             # Hard guarantee for weather: return the full tool output verbatim.
             # Some agent/LLM stacks may paraphrase or omit parts of a tool response;
             # this bypass ensures callers always get the raw API payload.
-            if self._looks_like_weather_query(query):
-                location = self._extract_location_from_weather_query(query)
-                return get_weather(location)
+            if _looks_like_weather_query(query):
+                location = _extract_location_from_weather_query(query)
+                return await get_weather(location)
 
-            result = await self.agent.run(query)
+            result = await self._run_agent(query)
             return result
         except Exception as e:
             return f"Error processing query: {str(e)}"
 
-    @staticmethod
-    def _looks_like_weather_query(query: str) -> bool:
-        return bool(re.search(r"\bweather\b", query, re.IGNORECASE))
-
-    @staticmethod
-    def _extract_location_from_weather_query(query: str) -> str:
-        """Best-effort location extractor.
-
-        The caller often sends queries like:
-        - "weather in Faisalabad"
-        - "weather in Faisalabad, including temperature, humidity, wind speed..."
+    async def _run_agent(self, query: str):
+        """Run `query` through the agent, sharing one call among concurrent duplicates.
 
-        We only want the actual place name for geocoding, not the rest of the request.
+        Bursts of identical queries (e.g. orchestrator retries) await the same
+        in-flight agent run instead of each issuing its own OpenAI request.
         """
+        task = self._inflight.get(query)
+        if task is None:
+            task = asyncio.ensure_future(self.agent.run(query))
+            self._inflight[query] = task
 
-        # Common patterns: "weather in Karachi", "weather for London".
-        m = re.search(r"\bweather\b.*?\b(?:in|for)\s+([^?\n\r]+)", query, re.IGNORECASE)
-        location = m.group(1).strip() if m else query.strip()
+            def _forget(done: asyncio.Future):
+                if self._inflight.get(query) is done:
+                    del self._inflight[query]
 
-        # Truncate on separators / common continuation phrases.
-        # e.g. "Faisalabad, including temperature..." -> "Faisalabad"
-        location = re.split(
-            r"\s*(?:,|;|\.|\(|\)|\bincluding\b|\bwith\b|\bshow\b|\bgive\b|\band\b)\s*",
-            location,
-            maxsplit=1,
-            flags=re.IGNORECASE,
-        )[0]
+            task.add_done_callback(_forget)
+        # Shield so one caller's cancellation doesn't cancel the run for the others.
+        return await asyncio.shield(task)
+
+    async def close(self):
+        """Close the shared HTTP session (call from the host's shutdown hook)."""
+        global _HTTP
+        if _HTTP is not None and not _HTTP.closed:
+            await _HTTP.close()
+        _HTTP = None
 
-        return location.strip().strip("?").strip()
-    
     async def start_interactive_mode(self):
         """Start an interactive chat session with the agent."""
         print(f"🤖 {self.agent_name} is ready!")
@@ -232,6 +308,8 @@ class OpenAIAgent:
 
 async def main():
     """Main function to run the agent."""
+    setup_logging()
+
     # Check if OpenAI API key is set
     if not os.getenv("OPENAI_API_KEY"):
         print("❌ Error: OPENAI_API_KEY is not set in the .env file")
@@ -254,5 +332,7 @@ async def main():
         # Start interactive mode by default
         await agent.start_interactive_mode()
 
+    await agent.close()
+
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,185 @@
+from datetime import datetime
+from typing import Any
+
+import msgspec
+from botbuilder.schema import (
+    Activity,
+    Attachment,
+    ChannelAccount,
+    ConversationAccount,
+    ConversationReference,
+    Entity,
+    MessageReaction,
+)
+
+# Typed views of inbound A2A JSON-RPC payloads. msgspec only materializes the fields
+# declared here and skips everything else in the body.
+
+class A2AMessage(msgspec.Struct):
+    contextId: str | None = None
+    context_id: str | None = None
+    messageId: str | None = None
+    message_id: str | None = None
+    parts: list[dict] = []
+
+class RpcParams(msgspec.Struct):
+    """Params of the supported methods: `message` for message/send, `id` for tasks/get."""
+    message: A2AMessage = msgspec.field(default_factory=A2AMessage)
+    id: str | int | None = None
+
+class JsonRpcEnvelope(msgspec.Struct):
+    """Just enough of a body to tell whether it is JSON-RPC and to echo its `id`."""
+    jsonrpc: Any = None
+    id: Any = None
+
+class JsonRpcRequest(JsonRpcEnvelope):
+    """A JSON-RPC request decoded without the Activity field constraints."""
+    method: str | None = None
+    params: RpcParams | None = None
+
+# Typed view of an inbound Bot Framework Activity, decoded straight from the request
+# bytes. It covers the fields `BotFrameworkAdapter`, `TurnContext`, `ActivityHandler`
+# and `MyAgentBot` read; nested schema objects the adapter only passes through
+# (attachments, entities, reactions, relatesTo) are kept as plain JSON and handed to
+# botbuilder's own deserializer.
+
+def _deserialize_list(model, items: list[dict] | None):
+    return [model.deserialize(item) for item in items] if items is not None else None
+
+class ChannelAccountIn(msgspec.Struct):
+    id: str | None = None
+    name: str | None = None
+    aadObjectId: str | None = None
+    role: str | None = None
+
+    def to_model(self) -> ChannelAccount:
+        return ChannelAccount(
+            id=self.id,
+            name=self.name,
+            aad_object_id=self.aadObjectId,
+            role=self.role,
+        )
+
+class ConversationAccountIn(ChannelAccountIn):
+    isGroup: bool | None = None
+    conversationType: str | None = None
+    tenantID: str | None = None
+
+    def to_model(self) -> ConversationAccount:
+        return ConversationAccount(
+            id=self.id,
+            name=self.name,
+            aad_object_id=self.aadObjectId,
+            role=self.role,
+            is_group=self.isGroup,
+            conversation_type=self.conversationType,
+            tenant_id=self.tenantID,
+        )
+
+class ActivityIn(msgspec.Struct):
+    type: str | None = None
+    id: str | None = None
+    text: str | None = None
+    serviceUrl: str | None = None
+    channelId: str | None = None
+    from_: ChannelAccountIn | None = msgspec.field(default=None, name="from")
+    recipient: ChannelAccountIn | None = None
+    conversation: ConversationAccountIn | None = None
+    membersAdded: list[ChannelAccountIn] | None = None
+    membersRemoved: list[ChannelAccountIn] | None = None
+    replyToId: str | None = None
+    locale: str | None = None
+    name: str | None = None
+    value: Any = None
+    channelData: Any = None
+    deliveryMode: str | None = None
+    callerId: str | None = None
+    timestamp: datetime | None = None
+    localTimestamp: datetime | None = None
+    textFormat: str | None = None
+    inputHint: str | None = None
+    action: str | None = None
+    relatesTo: dict | None = None
+    attachments: list[dict] | None = None
+    entities: list[dict] | None = None
+    reactionsAdded: list[dict] | None = None
+    reactionsRemoved: list[dict] | None = None
+
+    def to_activity(self) -> Activity:
+        return Activity(
+            type=self.type,
+            id=self.id,
+            text=self.text,
+            service_url=self.serviceUrl,
+            channel_id=self.channelId,
+            from_property=self.from_.to_model() if self.from_ else None,
+            recipient=self.recipient.to_model() if self.recipient else None,
+            conversation=self.conversation.to_model() if self.conversation else None,
+            members_added=(
+                [m.to_model() for m in self.membersAdded] if self.membersAdded is not None else None
+            ),
+            members_removed=(
+                [m.to_model() for m in self.membersRemoved] if self.membersRemoved is not None else None
+            ),
+            reply_to_id=self.replyToId,
+            locale=self.locale,
+            name=self.name,
+            value=self.value,
+            channel_data=self.channelData,
+            delivery_mode=self.deliveryMode,
+            caller_id=self.callerId,
+            timestamp=self.timestamp,
+            local_timestamp=self.localTimestamp,
+            text_format=self.textFormat,
+            input_hint=self.inputHint,
+            action=self.action,
+            relates_to=(
+                ConversationReference.deserialize(self.relatesTo) if self.relatesTo is not None else None
+            ),
+            attachments=_deserialize_list(Attachment, self.attachments),
+            entities=_deserialize_list(Entity, self.entities),
+            reactions_added=_deserialize_list(MessageReaction, self.reactionsAdded),
+            reactions_removed=_deserialize_list(MessageReaction, self.reactionsRemoved),
+        )
+
+class InboundPayload(ActivityIn):
+    """Body of a POST to /api/messages, decoded in a single pass.
+
+    Carries both the JSON-RPC (A2A) fields and the Activity fields; a JSON-RPC request
+    is recognized by `jsonrpc` plus `method`, anything else is treated as an Activity.
+    """
+    id: Any = None
+    jsonrpc: str | None = None
+    method: str | None = None
+    params: RpcParams | None = None
+
+# Outbound A2A result objects, encoded straight to JSON bytes by msgspec. Field order
+# matches the wire format.
+
+class TextPart(msgspec.Struct, kw_only=True):
+    kind: str = "text"
+    text: str
+
+class ResultMessage(msgspec.Struct, kw_only=True):
+    contextId: str | None
+    kind: str = "message"
+    messageId: str
+    taskId: str
+    parts: list[TextPart]
+    role: str
+
+class TaskStatus(msgspec.Struct, kw_only=True):
+    state: str
+    message: ResultMessage
+
+class ResultTask(msgspec.Struct, kw_only=True):
+    kind: str = "task"
+    id: str
+    contextId: str
+    history: list[ResultMessage]
+    status: TaskStatus
+
+class JsonRpcResponse(msgspec.Struct, kw_only=True):
+    jsonrpc: str = "2.0"
+    id: Any
+    result: ResultTask
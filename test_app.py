@@ -1,7 +1,11 @@
 from aiohttp import web
+import orjson
 import traceback
 import sys
 
+def json_dumps(obj) -> str:
+    return orjson.dumps(obj).decode()
+
 async def messages(req):
     try:
         print("\n" + "="*60)
@@ -15,7 +19,7 @@ async def messages(req):
         
         # Try to read the body
         try:
-            body = await req.json()
+            body = orjson.loads(await req.read())
             print(f"Body received: {body}")
         except Exception as e:
             print(f"❌ Failed to parse JSON: {e}")
@@ -36,7 +40,7 @@ async def messages(req):
             print(f"\n💬 User message: {user_text}")
             
             if not user_text:
-                return web.json_response({"error": "No text in message"}, status=400)
+                return web.json_response({"error": "No text in message"}, status=400, dumps=json_dumps)
             
             # Run the query
             print("🔄 Running query...")
@@ -47,7 +51,7 @@ async def messages(req):
             return web.json_response({
                 "type": "message",
                 "text": response
-            })
+            }, dumps=json_dumps)
             
         except Exception as e:
             print(f"\n❌ ERROR IN AGENT: {e}")
@@ -60,7 +64,7 @@ async def messages(req):
         return web.Response(status=500, text=f"Server error: {e}")
 
 async def health(req):
-    return web.json_response({"status": "ok"})
+    return web.json_response({"status": "ok"}, dumps=json_dumps)
 
 app = web.Application()
 app.router.add_post("/api/messages", messages)
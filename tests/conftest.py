@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The app modules live at the repository root and read their configuration at import.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
@@ -0,0 +1,155 @@
+import asyncio
+
+import msgspec
+import orjson
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+from botbuilder.schema import Activity
+
+import app
+from models import InboundPayload
+
+
+def make_app() -> web.Application:
+    # A fresh application per test: an aiohttp app is bound to the first loop it runs on.
+    application = web.Application()
+    application.router.add_post("/api/messages", app.messages)
+    return application
+
+
+def post_messages(body: dict):
+    """POST `body` to /api/messages and return (status, decoded JSON or text)."""
+
+    async def run():
+        async with TestClient(TestServer(make_app())) as client:
+            response = await client.post("/api/messages", json=body)
+            text = await response.text()
+            if response.content_type == "application/json":
+                return response.status, orjson.loads(text)
+            return response.status, text
+
+    return asyncio.run(run())
+
+
+def test_activity_decode_matches_botbuilder_deserialize():
+    body = {
+        "type": "message",
+        "id": "activity-1",
+        "timestamp": "2024-05-01T10:00:00.123456Z",
+        "localTimestamp": "2024-05-01T12:00:00.123+02:00",
+        "serviceUrl": "https://smba.example.com/",
+        "channelId": "msteams",
+        "from": {"id": "user-1", "name": "User", "aadObjectId": "aad-1", "role": "user"},
+        "recipient": {"id": "bot-1", "name": "Bot"},
+        "conversation": {"id": "conv-1", "isGroup": False, "conversationType": "personal", "tenantID": "t-1"},
+        "text": "hello",
+        "textFormat": "plain",
+        "locale": "en-US",
+        "deliveryMode": "expectReplies",
+        "callerId": "urn:botframework:azure",
+        "replyToId": "activity-0",
+        "inputHint": "acceptingInput",
+        "attachments": [{"contentType": "text/plain", "content": "hi", "name": "a.txt"}],
+        "entities": [{"type": "clientInfo"}],
+        "relatesTo": {"activityId": "a-0", "conversation": {"id": "conv-0"}, "channelId": "msteams"},
+        "channelData": {"tenant": {"id": "t-1"}},
+        "value": {"k": "v"},
+    }
+
+    decoded = msgspec.json.decode(orjson.dumps(body), type=InboundPayload).to_activity()
+
+    assert decoded.serialize() == Activity().deserialize(body).serialize()
+
+
+def test_expect_replies_activity_returns_buffered_replies(monkeypatch):
+    async def fake_run_query(query):
+        return f"agent:{query}"
+
+    monkeypatch.setattr(app.openai_agent, "run_query", fake_run_query)
+
+    status, body = post_messages(
+        {
+            "type": "message",
+            "id": "activity-1",
+            "serviceUrl": "https://unreachable.invalid/",
+            "channelId": "test",
+            "deliveryMode": "expectReplies",
+            "from": {"id": "user-1"},
+            "recipient": {"id": "bot-1"},
+            "conversation": {"id": "conv-1"},
+            "text": "hi",
+        }
+    )
+
+    assert status == 200
+    assert [activity["text"] for activity in body["activities"]] == ["agent:hi"]
+
+
+def test_tasks_get_numeric_id_returns_task_not_found():
+    status, body = post_messages({"jsonrpc": "2.0", "id": 7, "method": "tasks/get", "params": {"id": 42}})
+
+    assert status == 404
+    assert body["id"] == 7
+    assert body["error"]["code"] == -32001
+    assert body["error"]["data"] == {"id": 42}
+
+
+def test_tasks_get_null_params_returns_invalid_params():
+    status, body = post_messages({"jsonrpc": "2.0", "id": 8, "method": "tasks/get", "params": None})
+
+    assert status == 400
+    assert body["id"] == 8
+    assert body["error"]["code"] == -32602
+
+
+def test_json_rpc_params_of_wrong_type_return_json_rpc_error():
+    status, body = post_messages(
+        {"jsonrpc": "2.0", "id": "x", "method": "message/send", "params": {"message": {"parts": "hi"}}}
+    )
+
+    assert status == 400
+    assert body["id"] == "x"
+    assert body["error"]["code"] == -32602
+
+
+def test_json_rpc_request_is_not_bound_by_activity_field_types(monkeypatch):
+    async def fake_run_query(query):
+        return f"agent:{query}"
+
+    monkeypatch.setattr(app.openai_agent, "run_query", fake_run_query)
+
+    # `text` is a string on Activities; it means nothing to JSON-RPC requests.
+    status, body = post_messages(
+        {
+            "jsonrpc": "2.0",
+            "id": 9,
+            "method": "message/send",
+            "text": 5,
+            "params": {"message": {"parts": [{"kind": "text", "text": "hi"}]}},
+        }
+    )
+
+    assert status == 200
+    task = body["result"]
+    assert task["status"]["message"]["parts"][0]["text"].startswith("agent:hi")
+
+    status, body = post_messages({"jsonrpc": "2.0", "id": 10, "method": "tasks/get", "params": {"id": task["id"]}})
+    assert status == 200
+    assert body["result"]["id"] == task["id"]
+
+
+def test_malformed_json_rpc_body_returns_parse_error():
+    async def run():
+        async with TestClient(TestServer(make_app())) as client:
+            response = await client.post(
+                "/api/messages",
+                data=b'{"jsonrpc": "2.0", "method": ',
+                headers={"Content-Type": "application/json"},
+            )
+            return response.status, await response.json()
+
+    status, body = asyncio.run(run())
+
+    assert status == 400
+    assert body["id"] is None
+    assert body["error"]["code"] == -32700
@@ -0,0 +1,53 @@
+from app import TaskStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entry_expires_within_ttl():
+    clock = FakeClock()
+    store = TaskStore(maxsize=100, ttl=10, clock=clock)
+    store["a"] = "task-a"
+
+    clock.now = 4.9
+    assert store.get("a") == "task-a"
+    clock.now = 9.5
+    assert store.get("a") == "task-a"
+    clock.now = 10.0
+    assert store.get("a") is None
+    clock.now = 14.4
+    assert store.get("a") is None
+
+
+def test_entry_survives_at_least_half_ttl_across_rotations():
+    clock = FakeClock()
+    store = TaskStore(maxsize=100, ttl=10, clock=clock)
+    store["old"] = "task-old"
+    clock.now = 4.9
+    store["late"] = "task-late"
+
+    # The first generation rotates out at 5s; "late" was stored just before that.
+    clock.now = 5.0
+    store["next"] = "task-next"
+    assert store.get("late") == "task-late"
+    clock.now = 9.9
+    assert store.get("late") == "task-late"
+    clock.now = 10.0
+    assert store.get("old") is None
+    assert store.get("late") is None
+    assert store.get("next") == "task-next"
+
+
+def test_rotation_by_size_keeps_most_recent_half():
+    clock = FakeClock()
+    store = TaskStore(maxsize=4, ttl=3600, clock=clock)
+    for i in range(5):
+        store[str(i)] = f"task-{i}"
+
+    assert [store.get(str(i)) is not None for i in range(5)] == [False, False, True, True, True]
+    assert len(store) == 3
@@ -0,0 +1,41 @@
+import pytest
+
+from main import _extract_location_from_weather_query, _looks_like_weather_query
+
+LOCATION_CASES = [
+    ("weather in Faisalabad", "Faisalabad"),
+    ("What's the weather in Faisalabad, including temperature, humidity?", "Faisalabad"),
+    ("weather for New York with details", "New York"),
+    ("Weather in Andorra la Vella and show me", "Andorra la Vella"),
+    ("weather in London?", "London"),
+    ("Weather for São Paulo (Brazil)", "São Paulo"),
+    ("weather in   Lahore", "Lahore"),
+    ("weather in New  York", "New  York"),
+    ("weather in Tokyo. thanks", "Tokyo"),
+    ("weathered roofs in Paris; weather for Nice", "Nice"),
+    ("weather (in Paris) in summer", "Paris"),
+    ("weather in\tParis for tomorrow", "Paris for tomorrow"),
+    ("weather in Paris-and-Lyon", "Paris-"),
+    ("weather in Martha's Vineyard", "Martha's Vineyard"),
+    ("show weather\nin Paris", ""),
+    ("tell me the weather", "tell me the weather"),
+    ("WEATHER FOR BERLIN INCLUDING WIND", "BERLIN"),
+]
+
+
+@pytest.mark.parametrize("query, expected", LOCATION_CASES)
+def test_extract_location_from_weather_query(query, expected):
+    assert _extract_location_from_weather_query(query) == expected
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("weather in Paris", True),
+        ("What's the WEATHER like?", True),
+        ("weathered roofs", False),
+        ("hello", False),
+    ],
+)
+def test_looks_like_weather_query(query, expected):
+    assert _looks_like_weather_query(query) is expected